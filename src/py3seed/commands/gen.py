@@ -20,7 +20,7 @@ import configparser
 from typing import List
 
 from flask import request
-from jinja2 import Environment, TemplateSyntaxError, FileSystemLoader, filters
+from jinja2 import Environment, TemplateSyntaxError, FileSystemLoader, FileSystemBytecodeCache, filters
 from werkzeug.urls import url_quote, url_encode
 
 import py3seed.ext
@@ -30,6 +30,9 @@ from py3seed.merge3 import Merge3
 
 logger = logging.getLogger('pyseed')
 INCLUDES_FOLDER = '__includes'
+# Syntax in folder/file names, i.e, list syntax {{#name}} and varible syntax {{name}}
+LIST_SYNTAX_REGEX = re.compile('(\\{\\{#[a-zA-Z._]+\\}\\})')
+VARIABLE_SYNTAX_REGEX = re.compile('(\\{\\{[a-zA-Z._]+\\}\\})')
 
 
 def _prepare_jinja2_env(properties):
@@ -45,7 +48,12 @@ def _prepare_jinja2_env(properties):
     # For extension, plrease refer to https://jinja.palletsprojects.com/en/3.0.x/extensions/
     # - jinja2.ext.loopcontrols, add break and continue support in for loop
     #
-    env = Environment(trim_blocks=True, lstrip_blocks=True, keep_trailing_newline=True, extensions=['jinja2.ext.loopcontrols'])
+    # Compiled templates are cached in temp folder, so that unchanged templates are not compiled again in the following generations
+    # NOTE: Bytecode is checked against template source only, so cache files are scoped by py3seed version as the extensions may change
+    #
+    bytecode_cache = FileSystemBytecodeCache(pattern=f'__py3seed_{py3seed.__version__}_%s.cache')
+    env = Environment(trim_blocks=True, lstrip_blocks=True, keep_trailing_newline=True, extensions=['jinja2.ext.loopcontrols'],
+                      bytecode_cache=bytecode_cache)
 
     def update_query(**new_values):
         """ Update query. """
@@ -404,7 +412,7 @@ def _recursive_render(t_base, o_base, name, context, env):
     # Check list syntax, i.e, {{#name}}
     # This syntax iterate over every item of the list; do not generate anything if empty list and false value
     #
-    match_list = re.search('(\\{\\{#[a-zA-Z._]+\\}\\})', t_name)
+    match_list = LIST_SYNTAX_REGEX.search(t_name)
     if match_list:
         syntax = match_list.group(1)  # => {{#views}}
         key = syntax[3:-2]  # => views
@@ -431,7 +439,7 @@ def _recursive_render(t_base, o_base, name, context, env):
         # Check varible syntax, i.e, {{name}}
         # This syntax return the value of the varible
         #
-        match_variable = re.search('(\\{\\{[a-zA-Z._]+\\}\\})', t_name)
+        match_variable = VARIABLE_SYNTAX_REGEX.search(t_name)
         if match_variable:
             syntax = match_list.group(1)
             key = syntax[2:-2]
@@ -591,7 +599,7 @@ def _recursive_render(t_base, o_base, name, context, env):
                         other = f.read().splitlines(True)
                     #
                     m3 = Merge3(base, other, this)
-                    merged = ''.join(m3.merge_lines('OTHER', 'THIS'))
+                    merged = m3.merge_text('OTHER', 'THIS')
                     # print('\n'.join(m3.merge_annotated()))
                     with open(o_file_raw, 'w', encoding='utf-8') as f:
                         f.write(merged)
@@ -8,12 +8,161 @@
     :copyright: (c) 2021 by weiminfeng.
     :date: 2023/7/7
 """
+import difflib
+import sys
+from bisect import bisect_left
 
 
 class CantReprocessAndShowBase(Exception):
     """ Can't reprocess and show base. """
     pass
 
+
+def unique_lcs(a, b, alo, ahi, blo, bhi):
+    """ Find the longest common subsequence of lines that occur exactly once in both a[alo:ahi] and b[blo:bhi].
+
+    Return a list of (apos, bpos) pairs, using patience sorting, i.e, longest increasing subsequence of bpos.
+    """
+    # line -> [count in a, position in a, count in b, position in b]
+    index = {}
+    for i in range(alo, ahi):
+        entry = index.get(a[i])
+        if entry is None:
+            index[a[i]] = [1, i, 0, -1]
+        else:
+            entry[0] += 1
+    for j in range(blo, bhi):
+        entry = index.get(b[j])
+        if entry is not None and entry[0] == 1:
+            entry[2] += 1
+            entry[3] = j
+    # Pairs of unique lines, ordered by position in a
+    pairs = sorted((e[1], e[3]) for e in index.values() if e[0] == 1 and e[2] == 1)
+    if not pairs:
+        return []
+    # Longest increasing subsequence on position in b
+    tails = []  # smallest bpos that ends an increasing subsequence of each length
+    tail_indexes = []  # index in pairs of each tail
+    backpointers = [None] * len(pairs)
+    for k, (_, bpos) in enumerate(pairs):
+        n = bisect_left(tails, bpos)
+        if n == len(tails):
+            tails.append(bpos)
+            tail_indexes.append(k)
+        else:
+            tails[n] = bpos
+            tail_indexes[n] = k
+        backpointers[k] = tail_indexes[n - 1] if n > 0 else None
+    #
+    result = []
+    k = tail_indexes[-1]
+    while k is not None:
+        result.append(pairs[k])
+        k = backpointers[k]
+    result.reverse()
+    return result
+
+
+def _difflib_matches(a, b, alo, blo, ahi, bhi, answer):
+    """ Append matching lines between a[alo:ahi] and b[blo:bhi] found by difflib. """
+    matcher = difflib.SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+    for i, j, n in matcher.get_matching_blocks():
+        for k in range(n):
+            answer.append((alo + i + k, blo + j + k))
+
+
+def recurse_matches(a, b, alo, blo, ahi, bhi, answer, maxrecursion=10):
+    """ Find all the matching lines between a[alo:ahi] and b[blo:bhi] and append (apos, bpos) pairs to answer.
+
+    Unique lines are matched firstly, and then recurse into the gaps between them.
+    Leading and trailing equal lines are matched directly, and the rest gaps without unique lines fall back to difflib.
+    """
+    if alo == ahi or blo == bhi:
+        return
+    # Too deep, fall back to difflib
+    if maxrecursion < 0:
+        _difflib_matches(a, b, alo, blo, ahi, bhi, answer)
+        return
+    #
+    last_a = alo - 1
+    last_b = blo - 1
+    matches = unique_lcs(a, b, alo, ahi, blo, bhi)
+    for apos, bpos in matches:
+        if last_a + 1 != apos or last_b + 1 != bpos:
+            recurse_matches(a, b, last_a + 1, last_b + 1, apos, bpos, answer, maxrecursion - 1)
+        last_a = apos
+        last_b = bpos
+        answer.append((apos, bpos))
+    #
+    if matches:
+        recurse_matches(a, b, last_a + 1, last_b + 1, ahi, bhi, answer, maxrecursion - 1)
+    elif a[alo] == b[blo]:
+        # Match leading equal lines
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            answer.append((alo, blo))
+            alo += 1
+            blo += 1
+        recurse_matches(a, b, alo, blo, ahi, bhi, answer, maxrecursion - 1)
+    elif a[ahi - 1] == b[bhi - 1]:
+        # Match trailing equal lines
+        nahi = ahi - 1
+        nbhi = bhi - 1
+        while nahi > alo and nbhi > blo and a[nahi - 1] == b[nbhi - 1]:
+            nahi -= 1
+            nbhi -= 1
+        recurse_matches(a, b, alo, blo, nahi, nbhi, answer, maxrecursion - 1)
+        for i in range(ahi - nahi):
+            answer.append((nahi + i, nbhi + i))
+    else:
+        # No unique lines, e.g, repeated lines, fall back to difflib
+        _difflib_matches(a, b, alo, blo, ahi, bhi, answer)
+
+
+class PatienceSequenceMatcher:
+    """ Sequence matcher using patience diff, which has the same interface with difflib.SequenceMatcher.
+
+    Patience diff aligns the lines that are unique in both sides firstly, so it is O((N+M)logN) on most texts, and
+    tends to produce more readable hunks than difflib's longest matching block.
+    """
+
+    def __init__(self, isjunk=None, a=(), b=()):
+        """ Constructor.
+
+        :param isjunk: must be None, just for compatibility with difflib.SequenceMatcher, raise ValueError otherwise
+        """
+        if isjunk is not None:
+            raise ValueError('isjunk is not supported for patience diff, it must be None')
+        self.a = a
+        self.b = b
+        self.matching_blocks = None
+
+    def get_matching_blocks(self):
+        """ Return list of triples describing matching subsequences, i.e, (i, j, n) means a[i:i+n] == b[j:j+n].
+
+        The last triple is a dummy, (len(a), len(b), 0).
+        """
+        if self.matching_blocks is not None:
+            return self.matching_blocks
+        #
+        matches = []
+        recurse_matches(self.a, self.b, 0, 0, len(self.a), len(self.b), matches)
+        # Collapse matched lines into blocks
+        blocks = []
+        start_a = start_b = length = None
+        for i, j in matches:
+            if length is not None and i == start_a + length and j == start_b + length:
+                length += 1
+            else:
+                if length is not None:
+                    blocks.append((start_a, start_b, length))
+                start_a, start_b, length = i, j, 1
+        if length is not None:
+            blocks.append((start_a, start_b, length))
+        blocks.append((len(self.a), len(self.b), 0))
+        #
+        self.matching_blocks = blocks
+        return blocks
+
 def intersect(ra, rb):
     """ Given two ranges return the range where they intersect or None.
 
@@ -56,7 +205,7 @@ class Merge3:
     """
 
     def __init__(self, base, a, b, is_cherrypick: bool = False,
-                 sequence_matcher=None) -> None:
+                 sequence_matcher=None, use_patience: bool = False) -> None:
         """ Constructor.
 
         :param base: lines in BASE
@@ -65,16 +214,32 @@ class Merge3:
         :param is_cherrypick: flag indicating if this merge is a cherrypick.
             When cherrypicking b => a, matches with b and base do not conflict.
         :param sequence_matcher: Sequence matcher to use (defaults to
-            difflib.SequenceMatcher)
+            difflib.SequenceMatcher or PatienceSequenceMatcher)
+        :param use_patience: use PatienceSequenceMatcher when sequence_matcher is not given,
+            it is slower than difflib on small texts, e.g, templates, and only pays off on very large ones
         """
         if sequence_matcher is None:
-            import difflib
-            sequence_matcher = difflib.SequenceMatcher
+            sequence_matcher = PatienceSequenceMatcher if use_patience else difflib.SequenceMatcher
         self.base = base
         self.a = a
         self.b = b
+        # Detect byte mode once, the joiner is used to concatenate merged parts in a single allocation
+        self._joiner = b'' if self._uses_bytes() else ''
+        # Intern text lines, so that duplicated lines, e.g, blank lines, share one str object
+        # Matchers and range comparisons run on lines directly, and equal interned lines compare by identity
+        # NOTE: Lines can be any hashable objects, e.g, tuples, only str lines are interned
+        if not isinstance(self._joiner, bytes):
+            intern = sys.intern
+            self.base = [intern(line) if type(line) is str else line for line in base]
+            self.a = [intern(line) if type(line) is str else line for line in a]
+            self.b = [intern(line) if type(line) is str else line for line in b]
         self.is_cherrypick = is_cherrypick
         self.sequence_matcher = sequence_matcher
+        # Inputs are immutable by convention, so below results are computed once and cached
+        self._matching_blocks = None
+        self._sync_regions = None
+        self._unconflicted = None
+        self._merge_regions = None
 
     def _uses_bytes(self):
         if len(self.a) > 0:
@@ -96,9 +261,26 @@ class Merge3:
                     base_marker=None,
                     reprocess=False):
         """ Return merge in cvs-like form. """
+        yield from self._emit_parts(name_a, name_b, name_base, start_marker, mid_marker, end_marker, base_marker, reprocess)
+
+    def merge_text(self,
+                   name_a=None,
+                   name_b=None,
+                   name_base=None,
+                   start_marker=None,
+                   mid_marker=None,
+                   end_marker=None,
+                   base_marker=None,
+                   reprocess=False):
+        """ Return merge in cvs-like form, joined into a single str or bytes. """
+        parts = self._emit_parts(name_a, name_b, name_base, start_marker, mid_marker, end_marker, base_marker, reprocess)
+        return self._joiner.join(parts)
+
+    def _emit_parts(self, name_a, name_b, name_base, start_marker, mid_marker, end_marker, base_marker, reprocess):
+        """ Build the list of merged lines and markers, which is shared by merge_lines and merge_text. """
         if base_marker and reprocess:
             raise CantReprocessAndShowBase()
-        if self._uses_bytes():
+        if isinstance(self._joiner, bytes):
             if len(self.a) > 0:
                 if self.a[0].endswith(b'\r\n'):
                     newline = b'\r\n'
@@ -141,38 +323,37 @@ class Merge3:
         merge_regions = self.merge_regions()
         if reprocess is True:
             merge_regions = self.reprocess_merge_regions(merge_regions)
+        parts = []
+        extend = parts.extend
+        append = parts.append
         for t in merge_regions:
             what = t[0]
             if what == 'unchanged':
-                for i in range(t[1], t[2]):
-                    yield self.base[i]
+                extend(self.base[t[1]:t[2]])
             elif what == 'a' or what == 'same':
-                for i in range(t[1], t[2]):
-                    yield self.a[i]
+                extend(self.a[t[1]:t[2]])
             elif what == 'b':
-                for i in range(t[1], t[2]):
-                    yield self.b[i]
+                extend(self.b[t[1]:t[2]])
             elif what == 'conflict':
-                yield start_marker + newline
-                for i in range(t[3], t[4]):
-                    yield self.a[i]
+                append(start_marker + newline)
+                extend(self.a[t[3]:t[4]])
                 if base_marker is not None:
-                    yield base_marker + newline
-                    for i in range(t[1], t[2]):
-                        yield self.base[i]
-                yield mid_marker + newline
-                for i in range(t[5], t[6]):
-                    yield self.b[i]
-                yield end_marker + newline
+                    append(base_marker + newline)
+                    extend(self.base[t[1]:t[2]])
+                append(mid_marker + newline)
+                extend(self.b[t[5]:t[6]])
+                append(end_marker + newline)
             else:
                 raise ValueError(what)
+        #
+        return parts
 
     def merge_annotated(self):
         """ Return merge with conflicts, showing origin of lines.
 
         Most useful for debugging merge.
         """
-        if self._uses_bytes():
+        if isinstance(self._joiner, bytes):
             UNCHANGED = b'u'
             SEP = b' | '
             CONFLICT_START = b'<<<<\n'
@@ -212,7 +393,7 @@ class Merge3:
                 raise ValueError(what)
 
     def merge_groups(self):
-        """ Yield sequence of line groups.  Each one is a tuple:
+        """ Return list of line groups.  Each one is a tuple:
 
         'unchanged', lines
              Lines unchanged from base
@@ -228,7 +409,13 @@ class Merge3:
 
         'conflict', base_lines, a_lines, b_lines
              Lines from base were changed to either a or b and conflict.
+
+        NOTE: Regions are cached, but lines are sliced on each call, so that callers can change the returned groups safely.
         """
+        return list(self._iter_merge_groups())
+
+    def _iter_merge_groups(self):
+        """ Slice lines of each merge region. """
         for t in self.merge_regions():
             what = t[0]
             if what == 'unchanged':
@@ -271,6 +458,13 @@ class Merge3:
         The regions in between can be in any of three cases:
         conflicted, or changed on only one side.
         """
+        if self._merge_regions is None:
+            self._merge_regions = tuple(self._compute_merge_regions())
+        # Return a copy, so that callers can not change the cached one
+        return list(self._merge_regions)
+
+    def _compute_merge_regions(self):
+        """ Compute merge regions from sync regions. """
         # section a[0:ia] has been disposed of, etc
         iz = ia = ib = 0
 
@@ -412,17 +606,32 @@ class Merge3:
         if next_a < region_ia or next_b < region_ib:
             return 'conflict', None, None, next_a, region_ia, next_b, region_ib
 
+    def _get_matching_blocks(self):
+        """ Return matching blocks of base->a and base->b, which are shared by sync regions and unconflicted ranges. """
+        if self._matching_blocks is None:
+            amatches = self.sequence_matcher(
+                None, self.base, self.a).get_matching_blocks()
+            bmatches = self.sequence_matcher(
+                None, self.base, self.b).get_matching_blocks()
+            self._matching_blocks = amatches, bmatches
+        #
+        return self._matching_blocks
+
     def find_sync_regions(self):
         """ Return list of sync regions, where both descendents match the base.
 
         Generates a list of (base1, base2, a1, a2, b1, b2).  There is
         always a zero-length sync region at the end of all the files.
         """
+        if self._sync_regions is None:
+            self._sync_regions = self._compute_sync_regions()
+        # Return a copy, so that callers can not change the cached one
+        return list(self._sync_regions)
+
+    def _compute_sync_regions(self):
+        """ Compute sync regions from matching blocks. """
         ia = ib = 0
-        amatches = self.sequence_matcher(
-            None, self.base, self.a).get_matching_blocks()
-        bmatches = self.sequence_matcher(
-            None, self.base, self.b).get_matching_blocks()
+        amatches, bmatches = self._get_matching_blocks()
         len_a = len(amatches)
         len_b = len(bmatches)
 
@@ -474,27 +683,35 @@ class Merge3:
 
     def find_unconflicted(self):
         """ Return a list of ranges in base that are not conflicted."""
-        am = self.sequence_matcher(
-            None, self.base, self.a).get_matching_blocks()
-        bm = self.sequence_matcher(
-            None, self.base, self.b).get_matching_blocks()
+        if self._unconflicted is None:
+            self._unconflicted = self._compute_unconflicted()
+        # Return a copy, so that callers can not change the cached one
+        return list(self._unconflicted)
+
+    def _compute_unconflicted(self):
+        """ Compute unconflicted ranges from matching blocks. """
+        am, bm = self._get_matching_blocks()
+        # Walk the cached blocks by index instead of deleting their heads
+        ia = ib = 0
+        len_a = len(am)
+        len_b = len(bm)
 
         unc = []
 
-        while am and bm:
+        while ia < len_a and ib < len_b:
             # there is an unconflicted block at i; how long does it
             # extend?  until whichever one ends earlier.
-            a1 = am[0][0]
-            a2 = a1 + am[0][2]
-            b1 = bm[0][0]
-            b2 = b1 + bm[0][2]
+            a1 = am[ia][0]
+            a2 = a1 + am[ia][2]
+            b1 = bm[ib][0]
+            b2 = b1 + bm[ib][2]
             i = intersect((a1, a2), (b1, b2))
             if i:
                 unc.append(i)
 
             if a2 < b2:
-                del am[0]
+                ia += 1
             else:
-                del bm[0]
+                ib += 1
 
         return unc
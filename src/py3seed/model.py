@@ -11,7 +11,7 @@
 import json
 import sys
 from abc import ABCMeta
-from copy import deepcopy
+from copy import copy as shallow_copy, deepcopy
 from datetime import datetime
 from typing import no_type_check, Dict, Type, Callable, get_origin, get_args, Set, Any, ForwardRef, List, Tuple
 
@@ -42,6 +42,9 @@ class SimpleEnumMeta(type):
             enum_class._member_dict_[k] = v  # name -> value
             enum_class._title_dict_[k] = t  # name -> title
         # TODO: Check repeated names or values
+        enum_class._values_ = tuple(enum_class._member_dict_.values())  # Materialize values once for iteration
+        enum_class._value_set_ = frozenset(enum_class._values_)  # For fast validation
+        enum_class._type_ = type(enum_class._values_[0]) if enum_class._values_ else type(None)  # For fast conversion
         return enum_class
 
     def __getattribute__(cls, name):
@@ -55,7 +58,7 @@ class SimpleEnumMeta(type):
 
     def __iter__(cls):
         """ Returns all values. """
-        return (cls._member_dict_[name] for name in cls._member_dict_)
+        return iter(cls._values_)
 
     @property
     def __members__(cls):
@@ -72,11 +75,14 @@ class SimpleEnumMeta(type):
     @property
     def type(cls):
         """ Get type of members, All members should be the same type. """
-        return type(next(cls.__iter__(), None))
+        return cls._type_
 
     def validate(cls, value):
         """ Validate if a value is defined in a simple enum class. """
-        return value in cls._member_dict_.values()
+        try:
+            return value in cls._value_set_
+        except TypeError:  # Unhashable value, e.g, list, can not be a member
+            return False
 
     @property
     def titles(cls):
@@ -227,16 +233,21 @@ class ModelJSONEncoder(json.JSONEncoder):
 
     def default(self, o):
         """ Returns a serializable object for o. """
-        if isinstance(o, ObjectId):
-            return str(o)
-        elif isinstance(o, datetime):
+        # datetime is the most common non-json type in models, e.g, create_time/update_time, so check it firstly
+        if isinstance(o, datetime):
             return o.strftime(DATETIME_FORMAT)
+        elif isinstance(o, ObjectId):
+            return str(o)
         elif isinstance(o, BaseModel):
             return o.dict()
 
         return json.JSONEncoder.default(self, o)
 
 
+# Shared encoder for json() without extra options, similar to json's own default encoder
+_model_json_encoder = ModelJSONEncoder()
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 # Validator
 #
@@ -262,8 +273,14 @@ class ModelField:
     """ Field definition. """
     __slots__ = (
         'name',
-        'type',
+        '_type',
+        'origin',
+        'inner_type',
+        'is_enum',
+        'is_model',
+        'has_scalar_items',
         'default',
+        'is_default_callable',
         'required',
         'editable',
         'searchable',
@@ -294,6 +311,8 @@ class ModelField:
             self.default = None
         else:
             self.default = default
+        # default can be a callable, e.g, datetime.now, check it once here
+        self.is_default_callable = callable(self.default)
         # required is true if undefined
         if required is Undefined:
             self.required = True
@@ -328,6 +347,35 @@ class ModelField:
         # In page rendering, you can use user.tag_depends to draw select options
         self.depends = depends
 
+    @property
+    def type(self):
+        """ Annotation of field. """
+        return self._type
+
+    @type.setter
+    def type(self, type_):
+        """ Set annotation and resolve its origin and inner type once, so that validation/access do not need to introspect it again.
+
+        e.g,
+        - str -> origin is None, inner_type is str
+        - List[Post] -> origin is list, inner_type is Post
+        - Dict[str, str] -> origin is dict, inner_type is str
+
+        Kind of inner type is also resolved here, i.e, is_enum for SimpleEnum, is_model for sub model and has_scalar_items for list/dict of scalar values.
+        """
+        self._type = type_
+        self.origin = get_origin(type_)
+        if self.origin is dict:
+            self.inner_type = get_args(type_)[1]
+        elif self.origin is list:
+            self.inner_type = get_args(type_)[0]
+        else:
+            self.inner_type = type_
+        # ForwardRef is not a class, it is resolved and set again after model class is created
+        self.is_enum = isinstance(self.inner_type, SimpleEnumMeta)
+        self.is_model = isinstance(self.inner_type, ModelMeta)
+        self.has_scalar_items = self.origin is not None and (self.is_enum or self.inner_type in AUTHORIZED_TYPES)
+
     def __str__(self):
         return f'{self.name}/{self.type}/{self.default}/{self.required}/{self.format}'
 
@@ -388,12 +436,16 @@ class RelationField(ModelField):
 # Meta class
 #
 
-def evaluate_forward_ref(type_, globalns_):
+# Generated schemas, {model_class: schema}
+_schema_cache: Dict[type, Dict[str, Any]] = {}
+
+
+def evaluate_forward_ref(type_, globalns_, localns_=None):
     """ Create real class of forward ref. """
     if sys.version_info < (3, 9):
-        return type_._evaluate(globalns_, None)
+        return type_._evaluate(globalns_, localns_)
     else:
-        return type_._evaluate(globalns_, None, set())
+        return type_._evaluate(globalns_, localns_, set())
 
 
 class ModelMeta(ABCMeta):
@@ -422,7 +474,8 @@ class ModelMeta(ABCMeta):
                 if base is not BaseModel:
                     # Inherit the fields and properties defined by the parent class
                     # e.g, User is a subclass of MongoModel, the _id field defined in MongoModel must be accessible in User
-                    fields.update(deepcopy(base.__fields__))
+                    # Field attributes are only reassigned after creation, e.g, resolving ForwardRef, so a shallow copy of each field is enough
+                    fields.update({n: shallow_copy(f) for n, f in base.__fields__.items()})
                     # e.g, User is a subclass of MongoModel, the id property defined in MongoModel must be accessible in User
                     properties.update(deepcopy(base.__properties__))
                 # Id field's type should be defined in MongoModel/CacheModel, so we need to fetch them from bases
@@ -556,7 +609,7 @@ class ModelMeta(ABCMeta):
                             raise SchemaError(f'{ann_name}: {ann_type} default value is invalid')
                     else:
                         # Skip if default is callable, e.g, datetime.now
-                        if callable(field.default):
+                        if field.is_default_callable:
                             pass
                         elif isinstance(field.default, list):
                             pass
@@ -635,6 +688,9 @@ class ModelMeta(ABCMeta):
             '__slots__': slots,
             '__relations__': relations,
             '__properties__': properties,
+            # Non-relation fields in (name, field) pairs, so that validation does not need to check field kind for each instance
+            # NOTE: Back fields added to this class later are always relation fields, so it is not changed after class creation
+            '__value_fields__': tuple((n, f) for n, f in fields.items() if not isinstance(f, RelationField)),
             **{n: v for n, v in namespace.items() if n not in exclude_from_namespace},
         }
         cls = super().__new__(mcs, name, bases, new_namespace, **kwargs)
@@ -642,22 +698,23 @@ class ModelMeta(ABCMeta):
         # Try to update ForwardRef after class is created
         #
         if has_forward_refs:
-            globalns = sys.modules[cls.__module__].__dict__.copy()
-            globalns.setdefault(cls.__name__, cls)
+            # Pass the class itself as locals, so that the module globals do not need to be copied for each class
+            globalns = sys.modules[cls.__module__].__dict__
+            localns = {cls.__name__: cls}
+            resolved = {}  # Evaluate each forward ref name only once, e.g, ForwardRef('User') used by many fields
             for f in cls.__fields__.values():
-                f_origin = get_origin(f.type)
-                if f_origin is dict:
-                    _, f_type = get_args(f.type)
-                    if f_type.__class__ == ForwardRef:
-                        f.type = Dict[evaluate_forward_ref(f_type, globalns)]
-                elif f_origin is list:
-                    f_type = get_args(f.type)[0]
-                    if f_type.__class__ == ForwardRef:
-                        f.type = List[evaluate_forward_ref(f_type, globalns)]
-                else:
-                    f_type = f.type
-                    if f_type.__class__ == ForwardRef:
-                        f.type = evaluate_forward_ref(f_type, globalns)
+                f_origin, f_type = f.origin, f.inner_type
+                if f_type.__class__ == ForwardRef:
+                    ref_name = f_type.__forward_arg__
+                    if ref_name not in resolved:
+                        resolved[ref_name] = evaluate_forward_ref(f_type, globalns, localns)
+                    real_type = resolved[ref_name]
+                    if f_origin is dict:
+                        f.type = Dict[str, real_type]
+                    elif f_origin is list:
+                        f.type = List[real_type]
+                    else:
+                        f.type = real_type
         #
         # Try to create back field of relation fields after this class is created
         #
@@ -673,18 +730,15 @@ class ModelMeta(ABCMeta):
                     ownership=f.ownership,
                     is_back_field=True,  # Mark this field to be a back field created by a relation field
                 )
-                f_origin = get_origin(f.type)
-                if f_origin is dict:
-                    _, f_type = get_args(f.type)
-                elif f_origin is list:
-                    f_type = get_args(f.type)[0]
-                else:
-                    f_type = f.type
+                f_type = f.inner_type
                 # Update related model
                 f_type.__fields__[f.back_field_name] = back_field
                 f_type.__slots__ = tuple(f_type.__slots__) + (f.back_field_name,)
                 f_type.__relations__[f.back_field_name] = back_field
-
+        #
+        # Schemas are nested, and a new class may add back fields to its related models, so drop all the cached schemas
+        #
+        _schema_cache.clear()
         #
         return cls
 
@@ -750,16 +804,9 @@ class BaseModel(metaclass=ModelMeta):
         errors = []
         # Validate against schema
         # print(f'Validate {cls.__name__} with {data}')
-        for field_name, field_type in cls.__fields__.items():
-            # Skip recursive validation in relation value, just keep the relation value, your program may need this relation value for further processing
-            # NOTE: in save logic, we need to skip relation field, e.g, in mongosupport, we use self.dict(include_relations=False)
-            if isinstance(field_type, RelationField):
-                relation_value = data.get(field_name, Undefined)
-                if relation_value is not Undefined:
-                    data[field_name] = relation_value
-                #
-                continue
-            #
+        # Skip recursive validation in relation value, just keep the relation value in data, your program may need this relation value for further processing
+        # NOTE: in save logic, we need to skip relation field, e.g, in mongosupport, we use self.dict(include_relations=False)
+        for field_name, field_type in cls.__value_fields__:
             # Update id/ids field created by relation field
             # But can NOT do update in back relation field
             # e.g,
@@ -778,7 +825,7 @@ class BaseModel(metaclass=ModelMeta):
                 else:
                     update_value = None
                     if isinstance(relation_value, list):
-                        relation_type = get_args(source_field.type)[0]
+                        relation_type = source_field.inner_type
                         update_value = []
                         for v in relation_value:
                             if isinstance(v, dict):  # Value can be raw dict against related model
@@ -807,109 +854,92 @@ class BaseModel(metaclass=ModelMeta):
                     # update_value can be none or [], meaning clear the field
                     data[field_name] = update_value
             #
-            field_value, field_errors = cls._validate_field(field_type, data.get(field_name, Undefined))
+            field_value = cls._validate_field(field_type, data.get(field_name, Undefined), errors)
             if field_value is not Undefined:
                 values[field_name] = field_value
-            if field_errors:
-                errors.extend(field_errors)
-        # Check if any non-defined fields
-        undefined_fields = set(data.keys()) - set(cls.__fields__.keys())
-        if len(undefined_fields) > 0:
-            # Do not raise error for non-defined fields, because we are using __dict__ to store data and other dynamic attributes also use __dict__ to store
-            # errors.append(f'{cls.__name__}: Found undefined data fields, {undefined_fields}')
-            pass
+        # Non-defined fields in data are not checked
+        # Do not raise error for non-defined fields, because we are using __dict__ to store data and other dynamic attributes also use __dict__ to store
         #
         return values, errors
 
     @classmethod
-    def _validate_field(cls, field: ModelField, value: Any):
-        """ Validate value against field. """
-        field_errors = []
+    def _validate_field(cls, field: ModelField, value: Any, errors: List[DataError]):
+        """ Validate value against field, return validated value.
+
+        :param errors: Errors of the model being validated, new errors are appended to it directly
+        """
         # Undefined logic, check required and set default value
         if value is Undefined:
             if field.required:
-                field_errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} is required'))
+                errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} is required'))
             #
             field_value = value
-            if field.default is not None:
-                if callable(field.default):
-                    field_value = field.default()
-                else:
-                    field_value = field.default
+            if field.is_default_callable:
+                field_value = field.default()
+            elif field.default is not None:
+                field_value = field.default
         # Validate Logic, check value against field definition
         else:
-            origin = get_origin(field.type)
+            origin = field.origin
             # Dict
             if origin is dict:
                 if field.required and not value:
-                    field_errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} is required'))
+                    errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} is required'))
                 #
                 field_value = {}
-                v_type = get_args(field.type)[1]
+                v_type = field.inner_type
                 for k, v_ in value.items():
                     if not isinstance(k, str):
-                        field_errors.append(
-                            DataError(f'{cls.__name__}.{field.name}: {field.type} only support str keys'))
+                        errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} only support str keys'))
                     #
-                    type_value, type_errors = cls._validate_type(field, v_, v_type)
-                    field_value[k] = type_value
-                    if type_errors:
-                        field_errors.extend(type_errors)
+                    field_value[k] = cls._validate_type(field, v_, v_type, errors)
             # List
             elif origin is list:
                 if field.required and not value:
-                    field_errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} is required'))
+                    errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} is required'))
                 #
-                field_value = []
-                l_type = get_args(field.type)[0]
-                for v_ in value:
-                    type_value, type_errors = cls._validate_type(field, v_, l_type)
-                    field_value.append(type_value)
-                    if type_errors:
-                        field_errors.extend(type_errors)
+                l_type = field.inner_type
+                field_value = [cls._validate_type(field, v_, l_type, errors) for v_ in value]
             # built-in type, SimpleEnum or sub model
             else:
                 if field.required and value is None:
-                    field_errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} is required'))
+                    errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} is required'))
                 #
-                type_value, type_errors = cls._validate_type(field, value, field.type)
-                field_value = type_value
-                if type_errors:
-                    field_errors.extend(type_errors)
+                field_value = cls._validate_type(field, value, field.type, errors)
         #
-        # print(f'Validate field {field} with {value} -> {field_value} {field_errors}')
-        return field_value, field_errors
+        # print(f'Validate field {field} with {value} -> {field_value}')
+        return field_value
 
     @classmethod
-    def _validate_type(cls, field: ModelField, value: Any, type_: Type):
-        """ Validate simple type, i.e, built-in type, SimpleEnum or sub model. """
-        type_errors = []
+    def _validate_type(cls, field: ModelField, value: Any, type_: Type, errors: List[DataError]):
+        """ Validate simple type, i.e, built-in type, SimpleEnum or sub model, return validated value.
+
+        :param errors: Errors of the model being validated, new errors are appended to it directly
+        """
         type_value = value
         #
         if type_value is not None:
-            if isinstance(type_, SimpleEnumMeta):
+            if field.is_enum:
                 if not type_.validate(type_value):
-                    type_errors.append(
-                        DataError(f'{cls.__name__}.{field.name}: {field.type} has invalid value'))
-            elif issubclass(type_, BaseModel):
+                    errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} has invalid value'))
+            elif field.is_model:
                 # Value can be raw dict against sub model
                 if isinstance(type_value, dict):
                     type_value = type_(**value)
                     if type_value.__errors__:
-                        type_errors.extend(type_value.__errors__)
+                        errors.extend(type_value.__errors__)
                 # Value should be same type
                 elif not isinstance(type_value, type_):
-                    type_errors.append(
-                        DataError(f'{cls.__name__}.{field.name}: {field.type} only support {type_} value'))
+                    errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} only support {type_} value'))
                 # Value is a sub model
                 else:
-                    errors = type_value.validate()
-                    if errors:
-                        type_errors.extend(errors)
+                    sub_errors = type_value.validate()
+                    if sub_errors:
+                        errors.extend(sub_errors)
             elif not isinstance(type_value, type_):
-                type_errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} only support {type_} value'))
+                errors.append(DataError(f'{cls.__name__}.{field.name}: {field.type} only support {type_} value'))
         #
-        return type_value, type_errors
+        return type_value
 
     def __setattr__(self, name, value):
         """ Set a field. """
@@ -946,7 +976,7 @@ class BaseModel(metaclass=ModelMeta):
         if name in self.__class__.__fields__:
             field = self.__class__.__fields__[name]
             f_type = field.type
-            f_origin = get_origin(f_type)
+            f_origin = field.origin
             # Try to init relation values lazy
             if isinstance(field, RelationField):
                 # TODO: filter param is in mongodb's format, maybe more abstract approach is needed
@@ -957,7 +987,7 @@ class BaseModel(metaclass=ModelMeta):
                     else:
                         default = f_type.find_one({f_type.__id_name__: self.__dict__.get(field.save_field_name)})
                 elif f_origin is list:
-                    l_type = get_args(f_type)[0]
+                    l_type = field.inner_type
                     # This is a back field created by relation field, means this object id is saved in many related objects
                     if field.is_back_field:
                         # TODO: support paging, e.g, team.members__2 to fetch page 2's records and defined a back_field_page_size to config paging size
@@ -993,7 +1023,7 @@ class BaseModel(metaclass=ModelMeta):
             else:
                 default = None
                 if f_origin is None:
-                    if issubclass(f_type, BaseModel):
+                    if field.is_model:
                         # Create inner model automatically
                         default = f_type()
                 elif f_origin is list:
@@ -1040,7 +1070,7 @@ class BaseModel(metaclass=ModelMeta):
                 key_ = key.split(list_char)[0]
                 if key_ not in type_.__fields__:
                     raise PathError(f'path {check_path} is invalid')
-                type_ = get_args(type_.__fields__[key_].type)[0]
+                type_ = type_.__fields__[key_].inner_type
             else:
                 if key not in type_.__fields__:
                     raise PathError(f'path {check_path} is invalid')
@@ -1050,11 +1080,25 @@ class BaseModel(metaclass=ModelMeta):
 
     def copy(self, update: Dict[str, Any] = None, deep: bool = False):
         """ Copy logic. """
-        update = update or {}
-        v = dict(
-            self._iter(),
-            **update,
-        )
+        fields = self.__class__.__fields__
+        v = {}
+        for field_name, field_value in self.__dict__.items():
+            field = fields.get(field_name)
+            # __dict__ may contain some other dynamic attributes, skip non-defined fields and relations
+            if field is None or isinstance(field, RelationField):
+                continue
+            # Fast path for scalar fields, only containers and sub models need to be copied recursively
+            if field.origin is None and not field.is_model and not isinstance(field_value, (dict, list)):
+                v[field_name] = field_value
+            # Containers of scalar values, e.g, List[str] or List[UserRole], need a shallow copy only
+            elif field.origin is list and field.has_scalar_items and isinstance(field_value, list):
+                v[field_name] = list(field_value)
+            elif field.origin is dict and field.has_scalar_items and isinstance(field_value, dict):
+                v[field_name] = dict(field_value)
+            else:
+                v[field_name] = self._get_value(field_value, False, False, None, None, False)
+        if update:
+            v.update(update)
         if deep:
             # chances of having empty dict here are quite low for using smart_deepcopy
             v = deepcopy(v)
@@ -1139,6 +1183,9 @@ class BaseModel(metaclass=ModelMeta):
 
     def json(self, **kwargs) -> str:
         """ Convert to json str. """
+        if not kwargs:
+            return _model_json_encoder.encode(self.dict())
+        #
         return json.dumps(self.dict(), cls=ModelJSONEncoder, **kwargs)
 
     @classmethod
@@ -1167,6 +1214,8 @@ class BaseModel(metaclass=ModelMeta):
           - add format to array, so that we can gen a component for the whole array
           - add searchables to object, so that it can be used to generate search form
           - add sortables to object, so that it can be used to generate order drowpdown
+
+        The schema is cached per class and the same dict is returned in the following calls.
         """
 
         def _gen_schema(type_: Type, parents=[]):
@@ -1174,7 +1223,7 @@ class BaseModel(metaclass=ModelMeta):
             if isinstance(type_, SimpleEnumMeta):
                 enum = _gen_schema(type_.type, parents)
                 enum.update({
-                    'enum': list(type_),
+                    'enum': list(type_._values_),
                     'enum_titles': type_.titles,
                     'format': Format.SELECT,
                     'py_type': type_.__name__,
@@ -1192,15 +1241,15 @@ class BaseModel(metaclass=ModelMeta):
                 relations = {}  # {model_name:[field_name]}, use dict to keep the order
                 for f_n, f_t in type_.__fields__.items():
                     field_schema = {}
-                    f_origin = get_origin(f_t.type)
+                    f_origin = f_t.origin
                     inner_type = None
                     # Dict
                     if f_origin is dict:
-                        f_type = get_args(f_t.type)[1]
+                        f_type = f_t.inner_type
                         # TODO: SUPPORT DICT
                     # List
                     elif f_origin is list:
-                        f_type = get_args(f_t.type)[0]
+                        f_type = f_t.inner_type
                         if f_type.__name__ in check_parents:
                             field_schema.update({
                                 'type': 'array',
@@ -1236,7 +1285,7 @@ class BaseModel(metaclass=ModelMeta):
                     # default
                     if f_t.default:
                         # Skip if default is callable, e.g, datetime.now
-                        if callable(f_t.default):
+                        if f_t.is_default_callable:
                             pass
                         else:
                             default = f_t.default
@@ -1329,6 +1378,10 @@ class BaseModel(metaclass=ModelMeta):
                 return {'type': 'date', 'format': Format.DATETIME, 'py_type': 'datetime'}
 
         #
-        ret = _gen_schema(cls)
+        # Model definition is immutable at runtime, so the schema is generated only once for each class
+        ret = _schema_cache.get(cls)
+        if ret is None:
+            ret = _gen_schema(cls)
+            _schema_cache[cls] = ret
         # print(json.dumps(ret))
         return ret
@@ -47,41 +47,89 @@ def work_in(dirname=None):
 
     When exited, returns to the working directory prior to entering.
     """
+    # Nothing to change, so skip the getcwd/chdir round-trip
+    if dirname is None:
+        yield
+        return
+    #
     curdir = os.getcwd()
     try:
-        if dirname is not None:
-            os.chdir(dirname)
+        os.chdir(dirname)
         yield
     finally:
         os.chdir(curdir)
 
 
-def generate_names(name):
-    """ Generate names, which can be used directly in code generation. """
-    if name in ('', '-', '$') or re.match(r'[\d+]+', name):
+# Match names leading with numbers, e.g, group column 1 or 1.1
+# Layout tokens are ascii only, so use re.ASCII to match \d against 0-9 only
+NUMBER_NAME_REGEX = re.compile(r'[\d+]+', re.ASCII)
+# Match separators that should be replaced by hyphen when generating names
+NAME_SEPARATOR_REGEX = re.compile(r'[.,?=#+]')
+
+
+def generate_names(name,
+                   _underscore=inflection.underscore, _dasherize=inflection.dasherize,
+                   _titleize=inflection.titleize, _pluralize=inflection.pluralize):
+    """ Generate names, which can be used directly in code generation.
+
+    NOTE: Inflection functions are bound as private default args, so that each lookup is a local one.
+    """
+    if name in ('', '-', '$') or NUMBER_NAME_REGEX.match(name):
         return {
             'name': name,
         }
     else:
-        name_hyphen = re.sub(r'[.,?=#+]', '-', ''.join(name.split()))  # e.g, plan.members-form -> plan-members-form
-        name_snake = inflection.underscore(name_hyphen)
-        name_kebab = inflection.dasherize(name_snake)
-        name_title = inflection.titleize(name_hyphen)
+        name_hyphen = NAME_SEPARATOR_REGEX.sub('-', ''.join(name.split()))  # e.g, plan.members-form -> plan-members-form
+        name_snake = _underscore(name_hyphen)
+        name_kebab = _dasherize(name_snake)
+        name_title = _titleize(name_hyphen)
+        name_title_lower = name_title.lower()
         return {
             'name': name,  # => SampleModel
             'name_lower': name.lower(),  # => samplemodel
             'name_snake': name_snake,  # => sample_model, e.g, python package&module name
-            'name_snake_plural': inflection.pluralize(name_snake),  # => sample_models
+            'name_snake_plural': _pluralize(name_snake),  # => sample_models
             'name_kebab': name_kebab,  # => sample-model, e.g, html folder&file name
-            'name_kebab_plural': inflection.pluralize(name_kebab),  # => sample-models
+            'name_kebab_plural': _pluralize(name_kebab),  # => sample-models
             'name_title': name_title,  # => Sample Model
-            'name_title_lower': name_title.lower(),  # => sample model
-            'name_title_lower_plural': inflection.pluralize(name_title.lower()),  # => sample models
+            'name_title_lower': name_title_lower,  # => sample model
+            'name_title_lower_plural': _pluralize(name_title_lower),  # => sample models
         }
 
 
-# Match span
-FORMAT_SPAN_REGEX = re.compile(r'^(.*)#([a-zA-Z_-]*)([0-9]*)$')
+def _to_bool(value):
+    """ Convert param value to bool. """
+    return value.lower() in ['1', 'true', 'yes']
+
+
+def _to_json(value):
+    """ Convert param value to list or dict, return value directly if it is not a valid json. """
+    try:
+        return json.loads(value)  # Need to use double quotes for string values or key names
+    except ValueError:
+        return value
+
+
+# Param handlers by key prefix, e.g, has_xxx or is_xxx is a bool param
+PARAM_KEY_HANDLERS = {'has_': _to_bool, 'is_': _to_bool}
+# Param handlers by value's leading char, e.g, [1, 2] or {"a": 1} is a json param
+PARAM_VALUE_HANDLERS = {'[': _to_json, '{': _to_json}
+
+
+def parse_param_value(key, value):
+    """ Convert param value according to its key prefix or leading char. """
+    value = value.strip()
+    for prefix, handler in PARAM_KEY_HANDLERS.items():
+        if key.startswith(prefix):
+            return handler(value)
+    #
+    handler = PARAM_VALUE_HANDLERS.get(value[:1])
+    return handler(value) if handler else value
+
+
+# Match column token in one pass, i.e, name?params#formatspan, e.g, a?param=1#summary4
+# NOTE: format and span can only follow the last #, and name ends at the first ?
+COLUMN_REGEX = re.compile(r'^(?P<name>[^?]*?)(?:\?(?P<params>.*?))?(?:#(?P<format>[a-zA-Z_-]*)(?P<span>[0-9]*))?$', re.ASCII)
 
 
 def parse_layout(body, schema):
@@ -161,11 +209,11 @@ def parse_layout(body, schema):
         first_line = _lines[0]
         first_indent = len(first_line) - len(first_line.lstrip())
         indexes = []
-        for index in range(len(_lines)):
-            line = _lines[index]
+        indexes_append = indexes.append  # local alias, avoid attribute lookup in loop
+        for index, line in enumerate(_lines):
             indent = len(line) - len(line.lstrip())
             if indent == first_indent:
-                indexes.append(index)
+                indexes_append(index)
             elif indent < first_indent:
                 raise LayoutError(f'Invalid indent {indent} < {first_indent}: ' + line.replace(" ", "."))
         # Parse each segment
@@ -176,7 +224,9 @@ def parse_layout(body, schema):
             segment = [l[first_indent:] for l in segment]
             # Parse segment, first line is fields seperated by comma and the rest are layout of each field
             index_line = segment[0]
-            columns = [_parse_column(c) for c in index_line.split(',')]
+            # Each parsed column is (column, is_group), so that group detection is done only once when parsing
+            parsed_columns = [_parse_column(c) for c in index_line.split(',')]
+            columns = [c for c, _ in parsed_columns]
             #
             # Cut inner layout
             #
@@ -189,11 +239,10 @@ def parse_layout(body, schema):
                     start_position = index_line.index(column['raw'])
                     if j < len(columns) - 1:
                         end_position = index_line.index(columns[j + 1]['name'])
-                        col_lines = [l[start_position:end_position] for l in body_lines]
                     else:
-                        col_lines = [l[start_position:] for l in body_lines]
-                    # Remove empty lines
-                    col_lines = [l for l in col_lines if l.strip()]
+                        end_position = None
+                    # Cut and remove empty lines in one pass
+                    col_lines = [c for c in (l[start_position:end_position] for l in body_lines) if c.strip()]
                     if not col_lines:  # some column may have not inner layout, e.g, blank column/simple field
                         continue
                     #
@@ -202,7 +251,7 @@ def parse_layout(body, schema):
             # Parse inner layout and do validation
             #
             for j in range(0, len(columns)):
-                column = columns[j]
+                column, is_group = parsed_columns[j]
                 col_name = column['name']
                 #
                 col_lines = column.get('lines', [])
@@ -225,7 +274,7 @@ def parse_layout(body, schema):
                 elif col_name == '-':
                     pass
                 # Group column, only contains number and dot(.)
-                elif col_name.replace('.', '').isdigit():
+                elif is_group:
                     if not col_lines:
                         raise LayoutError(f'Group {col_name} should have inner layout')
                     #
@@ -246,8 +295,9 @@ def parse_layout(body, schema):
                         inner_schema = column_schema
                         # Self-reference schema, inner schema should be processed before so that it can be found in object_schemas
                         # Just replace the properties as we may define differnt icon/title/description for current object
+                        # NOTE: Replace on a copy, as the given schema is cached and shared by model.schema(), changing it in place creates circular references
                         if 'ref' in column_schema:
-                            inner_schema['properties'] = object_schemas[column_schema['ref']]['properties']
+                            inner_schema = {**column_schema, 'properties': object_schemas[column_schema['ref']]['properties']}
                     elif column_type == 'array':
                         # Self-reference schema, inner schema should be processed before so that it can be found in object_schemas
                         if 'ref' in column_schema['items']:
@@ -270,63 +320,46 @@ def parse_layout(body, schema):
         return _rows
 
     def _parse_column(column_str):
-        """ Parse column string, having params and format-span, e.g, a?param=1#4. """
+        """ Parse column string, having params and format-span, e.g, a?param=1#4.
+
+        Return (column, is_group), is_group is true if column name only contains number and dot(.)
+        """
         column_str = column_str.strip()
+        column_match = COLUMN_REGEX.match(column_str)
+        name, column_params, format_, span = column_match.group('name', 'params', 'format', 'span')
         ret = {
             'raw': column_str,
-            'format': None,
-            'span': None,
-            'params': {},
+            'format': format_ or None,  # -> summary
+            'span': int(span) if span else None,  # -> 4
+            'params': _parse_params(column_params) if column_params is not None else {},
+            'name': name,
         }
-        # Parse span at the end, e.g, a?param=1#summary4
-        format_span_match = FORMAT_SPAN_REGEX.match(column_str)
-        if format_span_match:
-            column_str = format_span_match.group(1)
-            if format_span_match.group(2):
-                ret.update({'format': format_span_match.group(2)})  # -> summary
-            #
-            if format_span_match.group(3):
-                ret.update({'span': int(format_span_match.group(3))})  # -> 4
-        # Parse params, e.g, a?param=1#4
-        if '?' in column_str:
-            column_str, column_params = _parse_query_str(column_str)
-            ret.update({'params': column_params})
-        #
-        ret.update({'name': column_str})
         #
-        return ret
+        return ret, name.replace('.', '').isdigit()
 
-    def _parse_query_str(_query_str):
-        """ Parse query string. """
-        _path, _query_str = _query_str.split('?')
+    def _parse_params(_query_str):
+        """ Parse params of query string.
+
+        NOTE: Layout params are hand written, not url encoded, so values are kept as they are, e.g, + or %
+        """
         _params = {}
-        for p in _query_str.split('&'):
-            _key, _value = p.split('=')
-            #
+        for _param in _query_str.split('&'):
+            if not _param:
+                continue
+            # A key without = is kept with an empty value
+            _key, _, _value = _param.partition('=')
             _key = _key.lower()
-            _value = _value.strip()
-            if _key.startswith('has_') or _key.startswith('is_'):
-                if _value.lower() in ['1', 'true', 'yes']:
-                    _value = True
-                else:
-                    _value = False
-            elif _value.startswith('[') or _value.startswith('{'):
-                try:
-                    _value = json.loads(_value)  # Need to use double quotes for string values or key names
-                except ValueError as e:
-                    pass
-            #
-            _params[_key] = _value
+            _params[_key] = parse_param_value(_key, _value)
         #
-        return _path, _params
+        return _params
 
     # Return {action, params, rows}
     # Default action is read
     action = 'read'
     params = {}
     # Remove empty lines and remove trailing spaces for each line
-    lines = body.splitlines()
-    lines = [l.rstrip() for l in lines if l.strip()]
+    # NOTE: A blank line is empty after rstrip, so strip each line only once
+    lines = [l for l in map(str.rstrip, body.splitlines()) if l]
     if not lines:
         logger.error('Layout can NOT be empty')
         return None
@@ -338,7 +371,8 @@ def parse_layout(body, schema):
         lines = lines[1:]
         # Parse params, e.g, form?param=1
         if '?' in action_str:
-            action, params = _parse_query_str(action_str)
+            action, _, query_str = action_str.partition('?')
+            params = _parse_params(query_str)
     #
     rows = _parse_lines(0, lines, schema, action)
     #
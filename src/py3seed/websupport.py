@@ -12,6 +12,7 @@ import json
 import re
 
 from datetime import datetime
+from functools import lru_cache
 from typing import get_origin, get_args
 
 from flask.json.provider import DefaultJSONProvider
@@ -20,6 +21,55 @@ from py3seed import Comparator, SimpleEnumMeta, inflection, ModelJSONEncoder
 # Valid datetime formats
 _valid_formats = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d']
 
+# Formats that fast_datetime_parse parses by slicing, {format: length}
+_fixed_formats = {'%Y-%m-%d %H:%M:%S': 19, '%Y-%m-%d %H:%M:%S.%f': 26, '%Y-%m-%d': 10}
+
+# List indexes in path, i.e, roles[0] or roles-0, removed from path before resolving its type
+_list_index_regex = re.compile(r'[-\[]\d+\]?')
+# Key prefixes of models in form data, {model_class: (prefix, underscore_prefix)}
+_model_prefix_cache = {}
+
+
+@lru_cache(maxsize=1024)
+def _parse_search_key(model_cls, key):
+    """ Parse search key, return (field, comparator, type), e.g, point__gt -> (point, gt, int).
+
+    Results are cached with a bound as keys come from user input, e.g, sibling.sibling.name__like.
+    """
+    # Set default comparator
+    comparator = Comparator.EQ
+    if '__' in key:
+        field, comparator = key.split('__')
+    else:
+        field = key
+    # If field type is a list, please read mongo's document firstly, https://www.mongodb.com/docs/manual/tutorial/query-arrays/
+    # e.g, post.tags is List[str]
+    # - search condition {tags: 'tech'} will filter the whose tags contains tech
+    # - search condition {tags: {$in: ['tech', 'life']}} will filter whose tags contains tech or life
+    # - search condition {tags: ['tech', 'life']} will filter whose tags is same as [tech, life]
+    # We always do not want to match extractly the whole list field, so we need inner type to build condition
+    type_, _ = _get_field_type(model_cls, field)
+    #
+    return field, comparator, type_
+
+
+def _get_field_type(model_cls, path):
+    """ Get type of a path, return (type, is_list), type is the inner type if it is a list.
+
+    List indexes are removed from path, e.g, roles[0], roles[1] and roles-2 share roles[], so they are resolved only once.
+    """
+    return _resolve_field_type(model_cls, _list_index_regex.sub('[]', path))
+
+
+@lru_cache(maxsize=1024)
+def _resolve_field_type(model_cls, path):
+    """ Resolve type of a normalized path, results are cached with a bound as paths come from user input, e.g, sibling.sibling.name. """
+    type_ = model_cls.get_type(path)  # Raise PathError if path is invalid, which is not cached
+    if get_origin(type_) is list:
+        return get_args(type_)[0], True
+    #
+    return type_, False
+
 
 def _multidict_decode(md, dict_char='.', list_char='-'):
     """ Decode a multi-dict into a nested dict. """
@@ -111,8 +161,13 @@ def populate_model(multidict, model_cls):
     :param model_cls: model class to be populated
     """
     d = {}
-    model_prefix = model_cls.__name__.lower() + '.'  # demouser.name
-    model_prefix_underscore = inflection.underscore(model_cls.__name__) + '.'  # demo_user.name
+    prefixes = _model_prefix_cache.get(model_cls)
+    if prefixes is None:
+        prefixes = _model_prefix_cache[model_cls] = (
+            model_cls.__name__.lower() + '.',  # demouser.name
+            inflection.underscore(model_cls.__name__) + '.',  # demo_user.name
+        )
+    model_prefix, model_prefix_underscore = prefixes
     # NOTE: MultiDict.items() will only return the first value for the same key
     # MultiDict.lists() will return all values as list for the same key
     # e.g, MultiDict([('a', 'b'), ('a', 'c'), ('1', '2'), ('!', None)])
@@ -131,10 +186,8 @@ def populate_model(multidict, model_cls):
         if not values:
             continue
         #
-        type_ = model_cls.get_type(key)
-        origin = get_origin(type_)
-        if origin is list:
-            type_ = get_args(type_)[0]
+        type_, is_list = _get_field_type(model_cls, key)
+        if is_list:
             converted_value = [convert_from_string(v, type_) for v in values]
         else:
             value = values[0]  # NOTE: Only the first value is used as field type is not a list
@@ -165,23 +218,8 @@ def populate_search(multidict, model_cls):
             continue
         # Set value to search for page rendering
         search[key] = values if len(values) > 1 else values[0]
-        # Set default comparator
-        comparator = Comparator.EQ
-        if '__' in key:
-            field, comparator = key.split('__')
-        else:
-            field = key
-        # Convert value according to field type
-        type_ = model_cls.get_type(field)
-        # If field type is a list, please read mongo's document firstly, https://www.mongodb.com/docs/manual/tutorial/query-arrays/
-        # e.g, post.tags is List[str]
-        # - search condition {tags: 'tech'} will filter the whose tags contains tech
-        # - search condition {tags: {$in: ['tech', 'life']}} will filter whose tags contains tech or life
-        # - search condition {tags: ['tech', 'life']} will filter whose tags is same as [tech, life]
-        # We always do not want to match extractly the whole list field, so we need inner type to build condition
-        origin = get_origin(type_)
-        if origin is list:
-            type_ = get_args(type_)[0]
+        # Parse field, comparator and type to convert value
+        field, comparator, type_ = _parse_search_key(model_cls, key)
         # Build condition according to comparator
         if Comparator.EQ == comparator:
             if len(values) == 1:
@@ -195,8 +233,7 @@ def populate_search(multidict, model_cls):
             # NOTE: Performance issue for huge collection, as $regex is not index friendly
             # Use case-sensitive prefix expression can use mongodb index, regx = re.compile('^%s' % re.escape(v))
             # https://docs.mongodb.com/manual/reference/operator/query/regex/#index-use
-            regx = re.compile('.*%s.*' % re.escape(value), re.IGNORECASE)
-            cond = {'$regex': regx}
+            cond = {'$regex': _compile_like(value)}
         else:
             value = values[0]
             cond = {'$%s' % comparator: convert_from_string(value, type_)}
@@ -209,6 +246,12 @@ def populate_search(multidict, model_cls):
     return search, condition
 
 
+@lru_cache(maxsize=1024)
+def _compile_like(value):
+    """ Compile case-insensitive like regex for a search term, popular terms are cached. """
+    return re.compile('.*%s.*' % re.escape(value), re.IGNORECASE)
+
+
 def _normalized_path(path, list_char='-'):
     """ Change [] -> - for easier processing.
 
@@ -234,13 +277,35 @@ class BoolConverter(DefaultTypeConverter):
         return string_value.strip().lower() in ("yes", "true")
 
 
+def fast_datetime_parse(string_value, fmt='%Y-%m-%d %H:%M:%S'):
+    """ Parse datetime str, same as datetime.strptime(string_value, fmt).
+
+    Zero-padded values in the fixed formats, e.g, 2023-12-07 09:30:00, are parsed by slicing, which skips interpreting the format.
+    Other values or formats fall back to datetime.strptime.
+    """
+    s = string_value
+    n = _fixed_formats.get(fmt)
+    if n is not None and len(s) == n and s[4] == '-' and s[7] == '-':
+        if n == 10:
+            digits = s[0:4] + s[5:7] + s[8:10]
+            if digits.isascii() and digits.isdigit():  # strptime only accepts ascii digits
+                return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]))
+        elif s[10] == ' ' and s[13] == ':' and s[16] == ':' and (n == 19 or s[19] == '.'):
+            digits = s[0:4] + s[5:7] + s[8:10] + s[11:13] + s[14:16] + s[17:19] + s[20:]
+            if digits.isascii() and digits.isdigit():
+                return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                                int(s[11:13]), int(s[14:16]), int(s[17:19]), int(s[20:]) if n == 26 else 0)
+    #
+    return datetime.strptime(s, fmt)
+
+
 class DatetimeConverter(DefaultTypeConverter):
     """ str -> datetime """
 
     def _convert_from_string(self, string_value, type):
         for fmt in _valid_formats:
             try:
-                return datetime.strptime(string_value, fmt)
+                return fast_datetime_parse(string_value, fmt)
             except ValueError:
                 pass
         raise ValueError("can not convert %s to %s" % (string_value, type.__name__))
@@ -251,6 +316,7 @@ type_converters = {
     datetime: DatetimeConverter(),
     None: DefaultTypeConverter(),  # Default converter
 }
+_default_converter = type_converters[None]
 
 
 def convert_from_string(string_value, t):
@@ -259,10 +325,8 @@ def convert_from_string(string_value, t):
     if isinstance(string_value, t):
         return string_value
     #
-    if t in type_converters:
-        converter = type_converters[t]
-    else:
-        converter = type_converters[None]
+    # Single dict probe, falling back to the default converter
+    converter = type_converters.get(t, _default_converter)
     #
     return converter._convert_from_string(string_value, t)
 
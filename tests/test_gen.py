@@ -8,6 +8,7 @@
     :copyright: (c) 2023 by weiminfeng.
     :date: 2023/5/29
 """
+import json
 import os
 
 import pytest
@@ -121,6 +122,34 @@ def test_layout_parsing():
     assert second_row[0]['rows'][0][2]['name'] == 'tags'
     assert second_row[0]['rows'][0][2]['name'] == 'tags'
 
+    #
+    # Test params parsing
+    #
+    tag_form_layout = '''#!form?title=Tag&is_inline=yes&has_footer=0&sizes=[1, 2]
+          name
+    '''
+    layout = parse_layout(tag_form_layout, tag_schema)
+    assert layout['params'] == {'title': 'Tag', 'is_inline': True, 'has_footer': False, 'sizes': [1, 2]}
+    # Values are not url decoded
+    tag_form_layout = '''#!form?title=C++ Tips&desc=100%25 done&cfg={"a": "x+y"}
+          name
+    '''
+    layout = parse_layout(tag_form_layout, tag_schema)
+    assert layout['params'] == {'title': 'C++ Tips', 'desc': '100%25 done', 'cfg': {'a': 'x+y'}}
+
+    #
+    # Test parsing does not change the cached schema, e.g, self-referencing sibling
+    #
+    before = json.dumps(User.schema(), sort_keys=True, default=str)
+    sibling_layout = '''#!read?title=User
+          name
+          sibling
+            name, email
+    '''
+    layout = parse_layout(sibling_layout, User.schema())
+    assert layout['rows'][1][0]['rows'][0][1]['name'] == 'email'
+    assert json.dumps(User.schema(), sort_keys=True, default=str) == before
+
 
 def test_gen():
     """ Test Generation. """
@@ -9,6 +9,7 @@
     :date: 2023/7/7
 """
 
+import difflib
 import sys
 import struct
 
@@ -103,6 +104,11 @@ def test_no_changes():
     assert list(m3.find_sync_regions()) == [(0, 2, 0, 2, 0, 2), (2, 2, 2, 2, 2, 2)]
     assert list(m3.merge_regions()) == [('unchanged', 0, 2)]
     assert list(m3.merge_groups()) == [('unchanged', ['aaa', 'bbb'])]
+    # Cached results are returned as copies
+    m3.merge_regions().clear()
+    assert m3.merge_regions() == [('unchanged', 0, 2)]
+    m3.merge_groups()[0][1].clear()
+    assert m3.merge_groups() == [('unchanged', ['aaa', 'bbb'])]
 
 
 def test_front_insert():
@@ -148,7 +154,7 @@ def test_append_a():
                        ['aaa\n', 'bbb\n', '222\n'],
                        ['aaa\n', 'bbb\n'])
 
-    assert ''.join(m3.merge_lines()) == 'aaa\nbbb\n222\n'
+    assert m3.merge_text() == 'aaa\nbbb\n222\n'
 
 
 def test_append_b():
@@ -157,7 +163,7 @@ def test_append_b():
                        ['aaa\n', 'bbb\n'],
                        ['aaa\n', 'bbb\n', '222\n'])
 
-    assert ''.join(m3.merge_lines()) == 'aaa\nbbb\n222\n'
+    assert m3.merge_text() == 'aaa\nbbb\n222\n'
 
 
 def test_append_agreement():
@@ -166,7 +172,7 @@ def test_append_agreement():
                        ['aaa\n', 'bbb\n', '222\n'],
                        ['aaa\n', 'bbb\n', '222\n'])
 
-    assert ''.join(m3.merge_lines()) == 'aaa\nbbb\n222\n'
+    assert m3.merge_text() == 'aaa\nbbb\n222\n'
 
 
 def test_append_clash():
@@ -294,6 +300,7 @@ def test_merge_poem_bytes():
 
     ml = list(m3.merge_lines(b'LAO', b'TAO'))
     assert ml == [line.encode() for line in MERGED_RESULT]
+    assert m3.merge_text(b'LAO', b'TAO') == b''.join(ml)
 
 
 def test_minimal_conflicts_common():
@@ -457,3 +464,32 @@ def test_allow_objects():
             ('unchanged', [
                 (int2byte(x), int2byte(x)) for x in bytearray(b'abcde')]),
             ('a', [(b'f', b'f')])] == list(m3.merge_groups())
+
+
+def test_patience_sequence_matcher():
+    """ Patience matcher should align unique lines and fall back to difflib for repeated lines. """
+    a = ['a\n', 'b\n', 'c\n', 'd\n', 'x\n', 'x\n']
+    b = ['b\n', 'a\n', 'c\n', 'd\n', 'x\n']
+    blocks = merge3.PatienceSequenceMatcher(None, a, b).get_matching_blocks()
+    assert blocks[-1] == (len(a), len(b), 0)
+    for i, j, n in blocks:
+        assert a[i:i + n] == b[j:j + n]
+    assert (2, 2, 3) in blocks
+    # Same merge result with difflib matcher on the poem
+    m3 = merge3.Merge3(TZU, LAO, TAO, use_patience=True)
+    d3 = merge3.Merge3(TZU, LAO, TAO)
+    assert m3.merge_text('LAO', 'TAO') == d3.merge_text('LAO', 'TAO')
+    # isjunk is only accepted for compatibility
+    with pytest.raises(ValueError):
+        merge3.PatienceSequenceMatcher(lambda x: False, a, b)
+
+
+def test_custom_sequence_matcher():
+    """ Caller-supplied matcher should get the lines as they are. """
+    class RstripMatcher(difflib.SequenceMatcher):
+
+        def __init__(self, isjunk=None, a=(), b=()):
+            super().__init__(isjunk, [l.rstrip() for l in a], [l.rstrip() for l in b])
+
+    m3 = merge3.Merge3(['a\n', 'b\n'], ['a \n', 'b\n'], ['a\n', 'c\n'], sequence_matcher=RstripMatcher)
+    assert list(m3.merge_regions()) == [('unchanged', 0, 1), ('b', 1, 2)]
@@ -45,6 +45,7 @@ def test_model():
     assert schema['searchables'] == ['name__like', 'status']
     assert schema['properties']['team']['icon'] == 'users'
     assert schema['columns'] == User.__columns__
+    assert User.schema() is schema  # Cached
     # Relation schema
     assert schema['relations'] == ['Team']
     assert 'is_out_relation' not in schema['properties']['sibling']
@@ -89,6 +90,8 @@ def test_model():
     assert usr != another_usr
     assert usr.last_login.ip == another_usr.last_login.ip
     assert usr.last_login != another_usr.last_login
+    assert usr.roles == another_usr.roles
+    assert usr.roles is not another_usr.roles
     # Test json
     json_ = json.loads(usr.json())
     assert json_['create_time'] == usr.create_time.strftime(DATETIME_FORMAT)
@@ -9,11 +9,12 @@
     :date: 2023/12/7
 """
 
+import pytest
 from bson import ObjectId
 from datetime import datetime
 from werkzeug.datastructures import MultiDict
 
-from py3seed import populate_model, populate_search
+from py3seed import populate_model, populate_search, fast_datetime_parse
 from .core.models import UserStatus, UserRole, User
 
 
@@ -66,3 +67,19 @@ def test_populate_search():
     assert {'status': condition['status']} == {'status': {'$in': [UserStatus.NORMAL]}}
     assert {'roles': condition['roles']} == {'roles': {'$in': [UserRole.EDITOR, UserRole.ADMIN]}}  # Equal comparator on list field
     assert {'point': condition['point']} == {'point': {'$gt': 0, '$lt': 100}}  # Convert to int
+
+
+def test_fast_datetime_parse():
+    """ Test cases for fast_datetime_parse. """
+    for value, fmt in [
+        ('2023-12-07 09:30:00', '%Y-%m-%d %H:%M:%S'),
+        ('2023-12-07 09:30:00.123456', '%Y-%m-%d %H:%M:%S.%f'),
+        ('2023-12-07', '%Y-%m-%d'),
+        ('2023-1-7 9:30:00', '%Y-%m-%d %H:%M:%S'),  # Not zero-padded, fall back to strptime
+        ('07/12/2023', '%d/%m/%Y'),  # Other format, fall back to strptime
+    ]:
+        assert fast_datetime_parse(value, fmt) == datetime.strptime(value, fmt)
+    #
+    for value in ['2023-13-07 09:30:00', '2023-12-07 09:30:0x', '2023-12-07 09:30:00 ']:
+        with pytest.raises(ValueError):
+            fast_datetime_parse(value)